@@ -5,26 +5,40 @@
 # Descrição:
 #   Este sistema realiza o monitoramento automático de preços de produtos em
 #   diferentes sites, utilizando scraping com BeautifulSoup e Selenium.
-#   Os dados são armazenados em JSON, logs são mantidos em arquivo texto,
+#   Os dados são armazenados em JSON (metadados) e NDJSON (um arquivo de
+#   histórico por produto), logs são mantidos em arquivo texto,
 #   e a interface gráfica é feita com Streamlit, incluindo abas para dashboard,
 #   produtos, logs e configuração.
 # -----------------------------------------------------------------------------
 
-import requests
+import httpx
+import socket
+import functools
 from bs4 import BeautifulSoup
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime
-import json
+import orjson
 import os
+import re
+import hashlib
+import unicodedata
 import streamlit as st
 import logging
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import WebDriverException, TimeoutException, NoSuchElementException
 import time
 import threading
+import asyncio
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+
+# Deve ser o primeiro comando Streamlit: as funções em cache chamadas abaixo
+# emitem elementos (spinner) na primeira execução de cada processo
+st.set_page_config(layout="wide")
 
 # -----------------------------------------------------------------------------
 # Configuração de Logging
@@ -39,91 +53,559 @@ logging.basicConfig(
 # Constantes e Arquivos de Dados
 # -----------------------------------------------------------------------------
 DATA_FILE = 'precos.json'
+DATA_DIR = 'data'
+PRODUTOS_POR_PAGINA = 5
+# Limite de históricos em cache: cada novo preço gera uma nova entrada, e as
+# antigas precisam ser descartadas para a memória não crescer indefinidamente
+MAX_HISTORICOS_EM_CACHE = PRODUTOS_POR_PAGINA * 4
 
 # -----------------------------------------------------------------------------
 # Carregamento do Banco de Dados de Preços
 # -----------------------------------------------------------------------------
-if os.path.exists(DATA_FILE):
-    with open(DATA_FILE, 'r') as f:
-        historico_precos = json.load(f)
-else:
-    historico_precos = {}
+def _arquivo_precos(nome):
+    """
+    Retorna o caminho do arquivo NDJSON com o histórico de um produto.
+
+    Args:
+        nome (str): Nome do produto.
+
+    Returns:
+        str: Caminho do arquivo, único por nome de produto.
+    """
+    slug = unicodedata.normalize('NFKD', nome).encode('ascii', 'ignore').decode()
+    slug = re.sub(r'[^a-z0-9]+', '-', slug.lower()).strip('-')
+    sufixo = hashlib.sha1(nome.encode('utf-8')).hexdigest()[:8]
+    return os.path.join(DATA_DIR, f'{slug}-{sufixo}.ndjson')
+
+def _gravar_atomico(caminho, conteudo):
+    """
+    Grava o arquivo em um temporário e o substitui de uma só vez, para que uma
+    interrupção no meio da escrita nunca deixe o arquivo original truncado.
+
+    Args:
+        caminho (str): Caminho do arquivo de destino.
+        conteudo (bytes): Conteúdo completo do arquivo.
+    """
+    temporario = caminho + '.tmp'
+    with open(temporario, 'wb') as f:
+        f.write(conteudo)
+    os.replace(temporario, caminho)
+
+def _gravar_precos(nome, precos):
+    """
+    Reescreve por completo o arquivo NDJSON de um produto.
+
+    Args:
+        nome (str): Nome do produto.
+        precos (list): Registros de preço do produto.
+    """
+    os.makedirs(DATA_DIR, exist_ok=True)
+    conteudo = b''.join(orjson.dumps(registro) + b'\n' for registro in precos)
+    _gravar_atomico(_arquivo_precos(nome), conteudo)
+
+def _converter_registro(registro):
+    """
+    Converte um registro do formato antigo ({'timestamp': ISO, 'preco': valor})
+    para o formato compacto ({'t': epoch em segundos, 'p': valor}).
+
+    Args:
+        registro (dict): Registro de preço em qualquer um dos formatos.
+
+    Returns:
+        tuple: Registro no formato compacto e se houve conversão.
+    """
+    if 'timestamp' not in registro:
+        return registro, False
+    t = datetime.fromisoformat(registro['timestamp']).timestamp()
+    return {'t': t, 'p': registro['preco']}, True
+
+def _ler_precos(nome):
+    """
+    Lê o histórico de um produto a partir do seu arquivo NDJSON. Linhas
+    corrompidas (ex.: escrita interrompida) são descartadas, registros antigos
+    são convertidos e, nesses casos, o arquivo é reescrito.
+
+    Args:
+        nome (str): Nome do produto.
+
+    Returns:
+        list: Registros de preço do produto.
+    """
+    caminho = _arquivo_precos(nome)
+    if not os.path.exists(caminho):
+        return []
+    precos = []
+    corrompido = False
+    convertido = False
+    with open(caminho, 'rb') as f:
+        for linha in f:
+            if not linha.strip():
+                continue
+            try:
+                registro, antigo = _converter_registro(orjson.loads(linha))
+            except ValueError:
+                corrompido = True
+                continue
+            precos.append(registro)
+            convertido = convertido or antigo
+    if corrompido:
+        logging.warning(f"Linhas inválidas descartadas em {caminho}.")
+    if corrompido or convertido:
+        _gravar_precos(nome, precos)
+    return precos
+
+def _gravar_metadados(historico):
+    """
+    Salva no arquivo JSON apenas os metadados dos produtos (url, tag, classe e
+    validadores HTTP); os preços ficam nos arquivos NDJSON.
+
+    Args:
+        historico (dict): Histórico de preços por produto.
+    """
+    metadados = {
+        nome: {chave: valor for chave, valor in dados.items() if chave != 'precos'}
+        for nome, dados in historico.items()
+    }
+    _gravar_atomico(DATA_FILE, orjson.dumps(metadados, option=orjson.OPT_INDENT_2))
+
+@st.cache_resource
+def _carregar_historico():
+    """
+    Lê o histórico de preços do disco uma única vez por processo. O dicionário
+    retornado é o armazenamento vivo: alterações são feitas nele diretamente.
+    Arquivos no formato antigo (preços dentro do JSON) são migrados para NDJSON.
+
+    Returns:
+        dict: Histórico de preços por produto.
+    """
+    if not os.path.exists(DATA_FILE):
+        return {}
+    with open(DATA_FILE, 'rb') as f:
+        historico = orjson.loads(f.read())
+
+    migrado = False
+    for nome, dados in historico.items():
+        if 'precos' in dados:
+            dados['precos'] = [_converter_registro(registro)[0] for registro in dados['precos']]
+            _gravar_precos(nome, dados['precos'])
+            migrado = True
+        else:
+            dados['precos'] = _ler_precos(nome)
+    if migrado:
+        logging.info("Histórico migrado para arquivos NDJSON por produto.")
+        _gravar_metadados(historico)
+    return historico
+
+@st.cache_resource
+def _criar_trava_estado():
+    """
+    Cria a trava compartilhada entre as reexecuções do script e as threads de atualização.
+
+    Returns:
+        threading.RLock: Trava do histórico de preços.
+    """
+    return threading.RLock()
+
+historico_precos = _carregar_historico()
+
+# Toda leitura ou escrita de historico_precos (e de seus arquivos) ocorre sob
+# esta trava; o scraping em si roda fora dela.
+_STATE_LOCK = _criar_trava_estado()
+
+@st.cache_resource
+def _criar_sinal_metadados():
+    """
+    Cria o sinal compartilhado que indica metadados alterados apenas em memória.
+
+    Returns:
+        threading.Event: Sinal ligado enquanto houver alterações não salvas.
+    """
+    return threading.Event()
+
+# Validadores HTTP mudam a cada extração; são gravados em lote, não um a um
+_METADADOS_ALTERADOS = _criar_sinal_metadados()
 
 def salvar_dados():
     """
-    Salva o histórico de preços no arquivo JSON.
+    Salva os metadados dos produtos no arquivo JSON. Deve ser chamada com _STATE_LOCK adquirida.
+    """
+    _METADADOS_ALTERADOS.clear()
+    _gravar_metadados(historico_precos)
+
+def salvar_dados_pendentes():
+    """
+    Salva os metadados apenas se houver alterações ainda não gravadas.
+    """
+    with _STATE_LOCK:
+        if _METADADOS_ALTERADOS.is_set():
+            salvar_dados()
+
+def _anexar_preco(nome, registro):
+    """
+    Acrescenta um único registro ao arquivo NDJSON do produto, sem reescrever o histórico.
+
+    Args:
+        nome (str): Nome do produto.
+        registro (dict): Registro de preço a ser gravado.
     """
-    with open(DATA_FILE, 'w') as f:
-        json.dump(historico_precos, f, indent=2)
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(_arquivo_precos(nome), 'ab') as f:
+        f.write(orjson.dumps(registro) + b'\n')
+
+# -----------------------------------------------------------------------------
+# Sessão HTTP Compartilhada
+# -----------------------------------------------------------------------------
+HTTP_HEADERS = {'User-Agent': 'Mozilla/5.0'}
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+DNS_TTL_SEGUNDOS = 300
+
+@st.cache_resource
+def _ativar_cache_dns():
+    """
+    Memoriza as resoluções de DNS por até DNS_TTL_SEGUNDOS, para que novas
+    conexões com uma loja já visitada não repitam a consulta.
+
+    Atenção: substitui socket.getaddrinfo no processo inteiro, afetando também
+    o servidor do Streamlit e qualquer outra biblioteca. O TTL garante que
+    mudanças de IP (CDN, failover) sejam percebidas em poucos minutos.
+    """
+    getaddrinfo_original = socket.getaddrinfo
+
+    @functools.lru_cache(maxsize=256)
+    def _resolver(janela, *args, **kwargs):
+        return getaddrinfo_original(*args, **kwargs)
+
+    def getaddrinfo(*args, **kwargs):
+        # A janela de tempo faz parte da chave: ao virar, a consulta é refeita
+        janela = int(time.time() // DNS_TTL_SEGUNDOS)
+        return list(_resolver(janela, *args, **kwargs))
+
+    socket.getaddrinfo = getaddrinfo
+
+@st.cache_resource
+def _criar_sessao():
+    """
+    Cria o cliente HTTP reutilizado por todas as extrações, mantendo as conexões
+    abertas (keep-alive, HTTP/2) entre produtos do mesmo site.
+
+    Returns:
+        httpx.Client: Cliente com pool de conexões e novas tentativas de conexão.
+    """
+    transporte = httpx.HTTPTransport(http2=True, limits=HTTP_LIMITS, retries=2)
+    sessao = httpx.Client(
+        transport=transporte,
+        timeout=10.0,
+        headers=HTTP_HEADERS,
+        follow_redirects=True
+    )
+    atexit.register(sessao.close)
+    return sessao
+
+_ativar_cache_dns()
+
+# O Streamlit reexecuta o script a cada interação; o cache mantém uma única
+# sessão (e seu pool de conexões) durante toda a vida do processo.
+SESSION = _criar_sessao()
 
 # -----------------------------------------------------------------------------
 # Funções de Extração de Preço
 # -----------------------------------------------------------------------------
-def extrair_preco_com_selenium(url, tag, class_name):
+# Valor em formato brasileiro ("1.299,90", "1299,90") ou com ponto decimal ("199.90")
+_REGEX_PRECO = re.compile(r'([0-9]{1,3}(?:\.[0-9]{3})+|[0-9]+)(?:[,.]([0-9]{1,2}))?')
+
+def _converter_preco(texto):
     """
-    Extrai o preço de uma página utilizando Selenium, útil para páginas com proteção anti-bot ou JavaScript dinâmico.
+    Converte o texto de um elemento de preço (ex.: "R$ 1.299,90") em número.
 
     Args:
-        url (str): URL do produto.
-        tag (str): Tag HTML do elemento do preço.
-        class_name (str): Classe CSS do elemento do preço.
+        texto (str): Texto extraído da página.
 
     Returns:
-        float or None: Preço extraído ou None em caso de erro.
+        float: Preço convertido.
+
+    Raises:
+        ValueError: Se nenhum valor numérico for encontrado no texto.
+    """
+    m = _REGEX_PRECO.search(texto)
+    if not m:
+        raise ValueError(f"Preço não encontrado em {texto!r}")
+    return float(m.group(1).replace('.', '') + '.' + (m.group(2) or '00'))
+
+def _criar_driver():
+    """
+    Inicia uma instância do Chrome em modo headless para o scraping via Selenium.
+
+    Returns:
+        webdriver.Chrome: Driver pronto para uso.
     """
     options = Options()
     options.add_argument('--headless')
     options.add_argument('--disable-gpu')
     options.add_argument('--no-sandbox')
     options.add_argument('--disable-dev-shm-usage')
+    # Não espera imagens e recursos secundários: só o DOM interessa ao scraping
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    options.page_load_strategy = 'eager'
 
-    try:
-        driver = webdriver.Chrome(options=options)
-        driver.set_page_load_timeout(20)
-        driver.get(url)
-        time.sleep(15)  # Aguarda carregamento dinâmico
-
-        elementos = driver.find_elements(By.CLASS_NAME, class_name)
-        for el in elementos:
-            if el.tag_name.lower() == tag.lower():
-                preco_str = el.text.strip().replace('R$', '').replace(',', '.').strip()
-                preco = float(preco_str)
-                return preco
-
-    except (WebDriverException, TimeoutException, NoSuchElementException) as e:
-        logging.error(f"[Selenium] Erro: {e}")
-    finally:
+    driver = webdriver.Chrome(options=options)
+    driver.set_page_load_timeout(20)
+    return driver
+
+def _encerrar_driver(navegador):
+    """
+    Encerra o driver compartilhado, se houver, para que seja recriado na próxima chamada.
+
+    Args:
+        navegador (dict): Estado compartilhado retornado por _estado_navegador.
+    """
+    driver = navegador['driver']
+    navegador['driver'] = None
+    if driver is not None:
         try:
             driver.quit()
-        except:
+        except WebDriverException:
             pass
+
+@st.cache_resource
+def _estado_navegador():
+    """
+    Mantém um único Chrome aberto durante toda a vida do processo, evitando o
+    custo de inicialização do navegador a cada extração.
+
+    Returns:
+        dict: Driver compartilhado (iniciado sob demanda) e a trava que o protege.
+    """
+    navegador = {'driver': None, 'trava': threading.Lock()}
+    atexit.register(_encerrar_driver, navegador)
+    return navegador
+
+@functools.lru_cache(maxsize=256)
+def _seletor_css(tag, class_name):
+    """
+    Monta, uma única vez por par tag/classe, o localizador CSS do elemento do
+    preço, para que o filtro por tag e classe seja feito pelo próprio navegador.
+    Classes compostas ("a-price a-offscreen") viram seletores encadeados.
+
+    Args:
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+
+    Returns:
+        tuple: Localizador (By.CSS_SELECTOR, seletor) para o Selenium.
+    """
+    classes = ''.join(f'.{classe}' for classe in class_name.split())
+    return (By.CSS_SELECTOR, f'{tag.lower()}{classes}')
+
+def extrair_preco_com_selenium(url, tag, class_name):
+    """
+    Extrai o preço de uma página utilizando Selenium, útil para páginas com proteção anti-bot ou JavaScript dinâmico.
+
+    Args:
+        url (str): URL do produto.
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+
+    Returns:
+        float or None: Preço extraído ou None em caso de erro.
+    """
+    navegador = _estado_navegador()
+    with navegador['trava']:
+        try:
+            if navegador['driver'] is None:
+                navegador['driver'] = _criar_driver()
+            driver = navegador['driver']
+            driver.get(url)
+
+            # Aguarda o carregamento dinâmico apenas até o elemento do preço existir
+            seletor = _seletor_css(tag, class_name)
+            WebDriverWait(driver, 15).until(EC.presence_of_element_located(seletor))
+
+            elemento = driver.find_element(*seletor)
+            return _converter_preco(elemento.text)
+
+        except (TimeoutException, NoSuchElementException, ValueError) as e:
+            logging.error(f"[Selenium] Erro: {e}")
+        except WebDriverException as e:
+            # Navegador travado ou encerrado: descarta para recriar na próxima chamada
+            logging.error(f"[Selenium] Erro: {e}. Reiniciando o navegador.")
+            _encerrar_driver(navegador)
+        finally:
+            if navegador['driver'] is not None:
+                try:
+                    navegador['driver'].delete_all_cookies()
+                except WebDriverException:
+                    pass
+    return None
+
+@st.cache_resource
+def _criar_executor_selenium():
+    """
+    Cria o executor de uma única thread pelo qual passam todas as chamadas ao
+    Selenium, que não é thread-safe.
+
+    Returns:
+        ThreadPoolExecutor: Executor com um único worker.
+    """
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix='selenium')
+
+def extrair_preco_em_fila(url, tag, class_name):
+    """
+    Enfileira a extração via Selenium no executor dedicado e aguarda o resultado.
+
+    Args:
+        url (str): URL do produto.
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+
+    Returns:
+        float or None: Preço extraído ou None em caso de erro.
+    """
+    executor = _criar_executor_selenium()
+    return executor.submit(extrair_preco_com_selenium, url, tag, class_name).result()
+
+def _interpretar_html(conteudo, tag, class_name):
+    """
+    Localiza o elemento do preço no HTML da página e converte seu valor.
+
+    Args:
+        conteudo (bytes): HTML da página.
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+
+    Returns:
+        float or None: Preço extraído ou None se o elemento não existir.
+    """
+    soup = BeautifulSoup(conteudo, 'lxml')
+    preco_elemento = soup.find(tag, {'class': class_name})
+    if preco_elemento:
+        return _converter_preco(preco_elemento.text)
     return None
 
-def extrair_preco(url, tag, class_name):
+def _cabecalhos_condicionais(nome):
+    """
+    Monta os cabeçalhos de requisição condicional (If-None-Match /
+    If-Modified-Since) a partir dos validadores guardados do produto.
+
+    Args:
+        nome (str or None): Nome do produto.
+
+    Returns:
+        tuple: Cabeçalhos a enviar e o preço extraído da versão da página
+            correspondente (None se não houver validadores).
+    """
+    if nome is None:
+        return {}, None
+    with _STATE_LOCK:
+        dados = historico_precos.get(nome, {})
+        etag, last_modified, preco = dados.get('etag'), dados.get('last_modified'), dados.get('preco_extraido')
+    if preco is None:
+        return {}, None
+    cabecalhos = {}
+    if etag:
+        cabecalhos['If-None-Match'] = etag
+    if last_modified:
+        cabecalhos['If-Modified-Since'] = last_modified
+    return cabecalhos, preco
+
+def _registrar_validadores(nome, response, preco):
+    """
+    Guarda nos metadados do produto o ETag e o Last-Modified da página de onde
+    o preço foi extraído, para as próximas requisições condicionais. A
+    alteração fica em memória até a próxima chamada a salvar_dados_pendentes.
+
+    Args:
+        nome (str or None): Nome do produto.
+        response (httpx.Response): Resposta 200 da página do produto.
+        preco (float): Preço extraído dessa resposta.
+    """
+    if nome is None:
+        return
+    etag = response.headers.get('ETag')
+    last_modified = response.headers.get('Last-Modified')
+    novos = {
+        'etag': etag,
+        'last_modified': last_modified,
+        'preco_extraido': preco if (etag or last_modified) else None
+    }
+    with _STATE_LOCK:
+        dados = historico_precos[nome]
+        if any(dados.get(chave) != valor for chave, valor in novos.items()):
+            dados.update(novos)
+            _METADADOS_ALTERADOS.set()
+
+def _processar_resposta(response, tag, class_name, nome, preco_anterior):
+    """
+    Obtém o preço a partir da resposta HTTP: reaproveita o último preço extraído
+    quando a página não mudou (304) ou interpreta o HTML e registra os validadores.
+
+    Args:
+        response (httpx.Response): Resposta da página do produto.
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+        nome (str or None): Nome do produto.
+        preco_anterior (float or None): Preço da versão da página já conhecida.
+
+    Returns:
+        float or None: Preço extraído ou None se o elemento não for encontrado.
+    """
+    if response.status_code == 304 and preco_anterior is not None:
+        return preco_anterior
+    preco = _interpretar_html(response.content, tag, class_name)
+    if preco is not None:
+        _registrar_validadores(nome, response, preco)
+    return preco
+
+def extrair_preco(url, tag, class_name, nome=None):
     """
     Extrai o preço de uma página utilizando BeautifulSoup. Caso falhe, utiliza Selenium como fallback.
+    Quando o produto é informado, a requisição é condicional: se a página não
+    mudou (304), o último preço extraído é reaproveitado sem novo parsing.
 
     Args:
         url (str): URL do produto.
         tag (str): Tag HTML do elemento do preço.
         class_name (str): Classe CSS do elemento do preço.
+        nome (str, optional): Nome do produto, cujos validadores HTTP são usados e atualizados.
 
     Returns:
         float or None: Preço extraído ou None em caso de erro.
     """
-    headers = {'User-Agent': 'Mozilla/5.0'}
+    cabecalhos, preco_anterior = _cabecalhos_condicionais(nome)
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        preco_elemento = soup.find(tag, {'class': class_name})
-        if preco_elemento:
-            preco_str = preco_elemento.text.strip().replace('R$', '').replace(',', '.').strip()
-            preco = float(preco_str)
+        response = SESSION.get(url, headers=cabecalhos)
+        preco = _processar_resposta(response, tag, class_name, nome, preco_anterior)
+        if preco is not None:
             return preco
-        else:
-            return extrair_preco_com_selenium(url, tag, class_name)
-    except Exception as e:
-        return extrair_preco_com_selenium(url, tag, class_name)
+    except Exception:
+        pass
+    return extrair_preco_em_fila(url, tag, class_name)
+
+async def extrair_preco_async(cliente, url, tag, class_name, nome=None):
+    """
+    Versão assíncrona de extrair_preco, usada na atualização periódica. Apenas
+    a requisição roda no loop de eventos: a trava, o parsing e o fallback via
+    Selenium são executados em threads, para não bloquear as demais requisições.
+
+    Args:
+        cliente (httpx.AsyncClient): Cliente HTTP assíncrono compartilhado.
+        url (str): URL do produto.
+        tag (str): Tag HTML do elemento do preço.
+        class_name (str): Classe CSS do elemento do preço.
+        nome (str, optional): Nome do produto, cujos validadores HTTP são usados e atualizados.
+
+    Returns:
+        float or None: Preço extraído ou None em caso de erro.
+    """
+    cabecalhos, preco_anterior = await asyncio.to_thread(_cabecalhos_condicionais, nome)
+    try:
+        response = await cliente.get(url, headers=cabecalhos)
+        preco = await asyncio.to_thread(_processar_resposta, response, tag, class_name, nome, preco_anterior)
+        if preco is not None:
+            return preco
+    except Exception:
+        pass
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_criar_executor_selenium(), extrair_preco_com_selenium, url, tag, class_name)
 
 # -----------------------------------------------------------------------------
 # Funções de Manipulação de Produtos e Preços
@@ -139,16 +621,17 @@ def adicionar_produto(nome, url, preco_atual, tag, class_name):
         tag (str): Tag HTML do elemento do preço.
         class_name (str): Classe CSS do elemento do preço.
     """
-    if nome not in historico_precos:
-        historico_precos[nome] = {
-            'url': url,
-            'tag': tag,
-            'class': class_name,
-            'precos': [
-                {'timestamp': datetime.now().isoformat(), 'preco': preco_atual}
-            ]
-        }
-        salvar_dados()
+    with _STATE_LOCK:
+        if nome not in historico_precos:
+            registro = {'t': time.time(), 'p': preco_atual}
+            historico_precos[nome] = {
+                'url': url,
+                'tag': tag,
+                'class': class_name,
+                'precos': [registro]
+            }
+            salvar_dados()
+            _gravar_precos(nome, [registro])
 
 def inserir_preco_manual(nome, preco):
     """
@@ -158,11 +641,24 @@ def inserir_preco_manual(nome, preco):
         nome (str): Nome do produto.
         preco (float): Preço a ser inserido.
     """
-    historico_precos[nome]['precos'].append({
-        'timestamp': datetime.now().isoformat(),
-        'preco': preco
-    })
-    salvar_dados()
+    registro = {'t': time.time(), 'p': preco}
+    with _STATE_LOCK:
+        historico_precos[nome]['precos'].append(registro)
+        _anexar_preco(nome, registro)
+
+def _dados_extracao(nome):
+    """
+    Lê, sob a trava, os dados necessários para extrair o preço de um produto.
+
+    Args:
+        nome (str): Nome do produto.
+
+    Returns:
+        tuple: URL, tag HTML e classe CSS do elemento do preço.
+    """
+    with _STATE_LOCK:
+        dados = historico_precos[nome]
+        return dados['url'], dados['tag'], dados['class']
 
 def atualizar_preco_automatico(nome):
     """
@@ -171,38 +667,65 @@ def atualizar_preco_automatico(nome):
     Args:
         nome (str): Nome do produto.
     """
-    dados = historico_precos[nome]
-    preco = extrair_preco(dados['url'], dados['tag'], dados['class'])
+    url, tag, class_name = _dados_extracao(nome)
+    preco = extrair_preco(url, tag, class_name, nome)
     if preco:
         inserir_preco_manual(nome, preco)
+    salvar_dados_pendentes()
 
 # -----------------------------------------------------------------------------
 # Funções de Visualização e Previsão
 # -----------------------------------------------------------------------------
+def _assinatura(nome_produto):
+    """
+    Resume o histórico de um produto para uso como chave de cache: muda sempre
+    que um novo preço é registrado.
+
+    Args:
+        nome_produto (str): Nome do produto.
+
+    Returns:
+        tuple: Quantidade de preços e instante (epoch) do último registro.
+    """
+    with _STATE_LOCK:
+        precos = historico_precos[nome_produto]['precos']
+        return (len(precos), precos[-1]['t'] if precos else None)
+
+@st.cache_data(show_spinner=False, max_entries=MAX_HISTORICOS_EM_CACHE)
+def _montar_df(nome_produto, assinatura):
+    """
+    Monta o DataFrame do histórico de um produto, indexado por data.
+
+    Args:
+        nome_produto (str): Nome do produto.
+        assinatura (tuple): Resultado de _assinatura, usado apenas para invalidar o cache.
+
+    Returns:
+        pandas.DataFrame: Histórico de preços indexado por timestamp.
+    """
+    with _STATE_LOCK:
+        precos = list(historico_precos[nome_produto]['precos'])
+    df = pd.DataFrame(precos)
+    # Cada instante é convertido com as regras do fuso local (inclusive horário
+    # de verão) e exibido no horário de parede, como era gravado antes
+    timestamp = pd.to_datetime(df['t'].map(datetime.fromtimestamp))
+    return pd.DataFrame({'preco': df['p'].to_numpy()}, index=pd.DatetimeIndex(timestamp, name='timestamp'))
+
 def gerar_grafico(nome_produto):
     """
-    Gera um gráfico de histórico de preços para um produto.
+    Gera a série do gráfico de histórico de preços de um produto, desenhada
+    no navegador por st.line_chart.
 
     Args:
         nome_produto (str): Nome do produto.
 
     Returns:
-        matplotlib.figure.Figure or None: Figura do gráfico ou None se não houver dados.
+        pandas.Series or None: Preços indexados por data ou None se não houver dados.
     """
-    dados = historico_precos[nome_produto]['precos']
-    if not dados:
+    assinatura = _assinatura(nome_produto)
+    if not assinatura[0]:
         return None
-    df = pd.DataFrame(dados)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-    fig, ax = plt.subplots(figsize=(6, 2))
-    ax.plot(df.index, df['preco'], marker='o')
-    ax.set_title(f'{nome_produto}')
-    ax.set_xlabel('Data')
-    ax.set_ylabel('R$')
-    ax.grid(True)
-    plt.xticks(rotation=30)
-    return fig
+    return _montar_df(nome_produto, assinatura)['preco']
 
 def prever_preco(nome_produto):
     """
@@ -214,55 +737,169 @@ def prever_preco(nome_produto):
     Returns:
         float or None: Preço previsto ou None se não houver dados suficientes.
     """
-    dados = historico_precos[nome_produto]['precos']
+    with _STATE_LOCK:
+        dados = historico_precos[nome_produto]['precos'][-3:]
     if len(dados) < 3:
         return None
-    df = pd.DataFrame(dados)
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    df.set_index('timestamp', inplace=True)
-    df['preco_ma'] = df['preco'].rolling(window=3).mean()
-    return df['preco_ma'].iloc[-1]
+    return (dados[-1]['p'] + dados[-2]['p'] + dados[-3]['p']) / 3.0
 
 # -----------------------------------------------------------------------------
 # Atualização Automática Periódica dos Produtos
 # -----------------------------------------------------------------------------
 ultima_execucao = 0
 
+async def _atualizar_com_seguranca(cliente, nome):
+    """
+    Atualiza um produto registrando no log qualquer erro, para que a falha de
+    um produto não interrompa a atualização dos demais.
+
+    Args:
+        cliente (httpx.AsyncClient): Cliente HTTP assíncrono compartilhado.
+        nome (str): Nome do produto.
+    """
+    try:
+        url, tag, class_name = await asyncio.to_thread(_dados_extracao, nome)
+        preco = await extrair_preco_async(cliente, url, tag, class_name, nome)
+        if preco:
+            await asyncio.to_thread(inserir_preco_manual, nome, preco)
+    except Exception as e:
+        logging.error(f"Erro ao atualizar {nome}: {e}")
+
+async def atualizar_todos_async(nomes):
+    """
+    Atualiza todos os produtos concorrentemente em um único loop de eventos,
+    compartilhando um cliente HTTP/2 assíncrono entre as requisições.
+
+    Args:
+        nomes (list): Nomes dos produtos a atualizar.
+    """
+    transporte = httpx.AsyncHTTPTransport(http2=True, limits=HTTP_LIMITS, retries=2)
+    async with httpx.AsyncClient(
+        transport=transporte,
+        timeout=10.0,
+        headers=HTTP_HEADERS,
+        follow_redirects=True
+    ) as cliente:
+        await asyncio.gather(*[_atualizar_com_seguranca(cliente, nome) for nome in nomes])
+    await asyncio.to_thread(salvar_dados_pendentes)
+
 CONFIG_FILE = 'config.json'
-if os.path.exists(CONFIG_FILE):
-    with open(CONFIG_FILE, 'r') as f:
-        configuracoes = json.load(f)
-        horas = configuracoes.get("frequencia_horas", 6)
-else:
-    horas = 6
+
+@st.cache_data
+def _carregar_config():
+    """
+    Lê as configurações do disco. O cache é invalidado ao salvar uma nova configuração.
+
+    Returns:
+        dict: Configurações da atualização automática.
+    """
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'rb') as f:
+            return orjson.loads(f.read())
+    return {"frequencia_horas": 6}
+
+horas = _carregar_config().get("frequencia_horas", 6)
 
 intervalo_em_segundos = horas * 3600
 
-def atualizar_todos_os_produtos_periodicamente():
+def atualizar_todos_os_produtos_periodicamente(agendador):
     """
     Thread responsável por atualizar automaticamente todos os produtos cadastrados
     em intervalos regulares definidos pelo usuário.
+
+    Args:
+        agendador (dict): Estado compartilhado com a interface ('intervalo' em
+            segundos e o evento 'acordar', sinalizado quando o intervalo muda).
     """
     global ultima_execucao
     while True:
         agora = time.time()
-        if agora - ultima_execucao > intervalo_em_segundos:
-            logging.info("Iniciando atualização automática de todos os produtos.")
-            for nome in historico_precos:
-                try:
-                    atualizar_preco_automatico(nome)
-                except Exception as e:
-                    logging.error(f"Erro ao atualizar {nome}: {e}")
-            ultima_execucao = agora
-        time.sleep(60)
+        restante = ultima_execucao + agendador['intervalo'] - agora
+        if restante > 0:
+            # Dorme até o próximo ciclo ou até a configuração ser alterada
+            agendador['acordar'].wait(timeout=restante)
+            agendador['acordar'].clear()
+            continue
+
+        logging.info("Iniciando atualização automática de todos os produtos.")
+        try:
+            with _STATE_LOCK:
+                nomes = list(historico_precos)
+            asyncio.run(atualizar_todos_async(nomes))
+        except Exception as e:
+            logging.error(f"Erro na atualização automática: {e}")
+        ultima_execucao = agora
+
+@st.cache_resource
+def _iniciar_agendador():
+    """
+    Inicia a thread de atualização automática uma única vez por processo,
+    mesmo com o Streamlit reexecutando o script a cada interação.
+
+    Returns:
+        dict: Estado compartilhado do agendador (intervalo e evento de despertar).
+    """
+    agendador = {'intervalo': intervalo_em_segundos, 'acordar': threading.Event()}
+    threading.Thread(target=atualizar_todos_os_produtos_periodicamente, args=(agendador,), daemon=True).start()
+    return agendador
 
 # Inicia a thread de atualização automática
-threading.Thread(target=atualizar_todos_os_produtos_periodicamente, daemon=True).start()
+_AGENDADOR = _iniciar_agendador()
+_WAKE = _AGENDADOR['acordar']
+
+# -----------------------------------------------------------------------------
+# Leitura dos Logs
+# -----------------------------------------------------------------------------
+@st.cache_data(show_spinner=False, max_entries=1)
+def _classificar_final_log(mtime, tamanho, n=100):
+    """
+    Lê apenas o final do arquivo de log e classifica cada linha pelo nível.
+    A modificação e o tamanho do arquivo servem de chave para o cache.
+
+    Args:
+        mtime (float): Data de modificação do arquivo de log.
+        tamanho (int): Tamanho do arquivo de log em bytes.
+        n (int): Quantidade de linhas finais a retornar.
+
+    Returns:
+        list: Pares (nível, linha) das últimas n linhas, na ordem do arquivo.
+    """
+    inicio = max(0, tamanho - 64 * 1024)
+    with open("log_precos.txt", "rb") as log_file:
+        log_file.seek(inicio)
+        linhas = log_file.read().decode(errors='replace').splitlines()
+    if inicio > 0:
+        linhas = linhas[1:]  # Primeira linha pode ter sido cortada ao meio
+
+    classificadas = []
+    for linha in linhas[-n:]:
+        if "ERROR" in linha:
+            nivel = 'ERROR'
+        elif "WARNING" in linha:
+            nivel = 'WARNING'
+        elif "INFO" in linha:
+            nivel = 'INFO'
+        else:
+            nivel = 'OTHER'
+        classificadas.append((nivel, linha.strip()))
+    return classificadas
 
 # -----------------------------------------------------------------------------
 # Interface Gráfica com Streamlit
 # -----------------------------------------------------------------------------
-st.set_page_config(layout="wide")
+def _nomes_produtos():
+    """
+    Retorna os nomes dos produtos guardados em st.session_state, recriando a
+    tupla apenas quando a quantidade de produtos cadastrados muda.
+
+    Returns:
+        tuple: Nomes dos produtos cadastrados.
+    """
+    with _STATE_LOCK:
+        if len(st.session_state.get('nomes_produtos', ())) != len(historico_precos):
+            st.session_state['nomes_produtos'] = tuple(historico_precos)
+    return st.session_state['nomes_produtos']
+
 st.sidebar.title("Menu")
 abas = st.sidebar.radio("Navegação", ["Dashboard", "Produtos", "Logs", "Configuração"])
 
@@ -284,9 +921,10 @@ if abas == "Dashboard":
 
     # Exibição de informações e histórico do produto selecionado
     if historico_precos:
-        produto_selecionado = st.selectbox("Produto:", list(historico_precos.keys()))
+        produto_selecionado = st.selectbox("Produto:", _nomes_produtos())
         if produto_selecionado:
-            dados = historico_precos[produto_selecionado]
+            with _STATE_LOCK:
+                dados = historico_precos[produto_selecionado]
             st.write(f"**URL:** {dados['url']}")
             st.write(f"**Tag:** {dados['tag']} | Classe: {dados['class']}")
 
@@ -299,23 +937,31 @@ if abas == "Dashboard":
                 st.success("Atualizado!")
 
             st.subheader("Histórico de Preços")
-            fig = gerar_grafico(produto_selecionado)
-            if fig:
-                st.pyplot(fig)
+            grafico = gerar_grafico(produto_selecionado)
+            if grafico is not None:
+                st.line_chart(grafico)
 
             previsao = prever_preco(produto_selecionado)
             if previsao:
                 st.info(f"Previsão (média móvel): R$ {previsao:.2f}")
 
-            df = pd.DataFrame(dados['precos'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            st.dataframe(df.sort_values(by='timestamp', ascending=False).head(10))
+            if dados['precos']:
+                df = _montar_df(produto_selecionado, _assinatura(produto_selecionado)).reset_index()
+                st.dataframe(df.sort_values(by='timestamp', ascending=False).head(10))
 
 # ---------------------- Aba Produtos ----------------------
 elif abas == "Produtos":
     st.title("📦 Produtos Cadastrados")
     if historico_precos:
-        for nome, dados in historico_precos.items():
+        nomes = _nomes_produtos()
+        total_paginas = -(-len(nomes) // PRODUTOS_POR_PAGINA)
+        pagina = st.number_input("Página", min_value=1, max_value=total_paginas, step=1, key='pagina')
+        st.caption(f"Página {pagina} de {total_paginas}")
+
+        inicio = (pagina - 1) * PRODUTOS_POR_PAGINA
+        for nome in nomes[inicio:inicio + PRODUTOS_POR_PAGINA]:
+            with _STATE_LOCK:
+                dados = historico_precos[nome]
             col1, col2 = st.columns([2, 3])
             with col1:
                 st.markdown(f"### {nome}")
@@ -324,14 +970,13 @@ elif abas == "Produtos":
                 previsao = prever_preco(nome)
                 if previsao:
                     st.success(f"Previsão: R$ {previsao:.2f}")
-                df = pd.DataFrame(dados['precos'])
-                if not df.empty:
-                    df['timestamp'] = pd.to_datetime(df['timestamp'])
+                if dados['precos']:
+                    df = _montar_df(nome, _assinatura(nome)).reset_index()
                     st.dataframe(df.sort_values(by='timestamp', ascending=False).head(5))
             with col2:
-                fig = gerar_grafico(nome)
-                if fig:
-                    st.pyplot(fig)
+                grafico = gerar_grafico(nome)
+                if grafico is not None:
+                    st.line_chart(grafico)
     else:
         st.info("Nenhum produto cadastrado.")
 
@@ -339,20 +984,14 @@ elif abas == "Produtos":
 elif abas == "Logs":
     st.title("📁 Logs do Sistema")
     try:
-        with open("log_precos.txt", "r") as log_file:
-            conteudo = log_file.readlines()
+        info_log = os.stat("log_precos.txt")
+        conteudo = _classificar_final_log(info_log.st_mtime, info_log.st_size)
 
         if conteudo:
+            exibir = {'ERROR': st.error, 'WARNING': st.warning, 'INFO': st.info, 'OTHER': st.write}
             with st.expander("▶ Ver Logs Detalhados", expanded=True):
-                for linha in reversed(conteudo[-100:]):
-                    if "ERROR" in linha:
-                        st.error(linha.strip())
-                    elif "WARNING" in linha:
-                        st.warning(linha.strip())
-                    elif "INFO" in linha:
-                        st.info(linha.strip())
-                    else:
-                        st.write(linha.strip())
+                for nivel, linha in reversed(conteudo):
+                    exibir[nivel](linha)
         else:
             st.info("O log está vazio.")
 
@@ -363,19 +1002,17 @@ elif abas == "Logs":
 elif abas == "Configuração":
     st.title("⚙️ Configuração de Atualização Automática")
 
-    CONFIG_FILE = 'config.json'
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            configuracoes = json.load(f)
-    else:
-        configuracoes = {"frequencia_horas": 6}
+    configuracoes = _carregar_config()
 
     horas = st.slider("Frequência de Atualização (em horas):", min_value=1, max_value=24, value=configuracoes.get("frequencia_horas", 6))
 
     if st.button("Salvar Configuração"):
         configuracoes["frequencia_horas"] = horas
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(configuracoes, f, indent=2)
-        st.success(f"A atualização automática ocorrerá a cada {horas} hora(s).")
-
-    intervalo_em_segundos = horas * 3600
\ No newline at end of file
+        with open(CONFIG_FILE, 'wb') as f:
+            f.write(orjson.dumps(configuracoes, option=orjson.OPT_INDENT_2))
+        _carregar_config.clear()
+
+        # Aplica o novo intervalo imediatamente, sem esperar o ciclo atual terminar
+        _AGENDADOR['intervalo'] = horas * 3600
+        _WAKE.set()
+        st.success(f"A atualização automática ocorrerá a cada {horas} hora(s).")
\ No newline at end of file
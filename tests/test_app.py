@@ -0,0 +1,37 @@
+import os
+
+import orjson
+import pytest
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # O app lê e grava seus arquivos no diretório atual
+    monkeypatch.chdir(tmp_path)
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    return AppTest.from_file(APP, default_timeout=30)
+
+
+def test_primeira_execucao_sem_erros(app):
+    app.run()
+    assert not app.exception
+
+
+def test_salvar_configuracao_e_reexecutar(app):
+    app.run()
+    app.sidebar.radio[0].set_value("Configuração").run()
+    app.slider[0].set_value(3).run()
+    app.button[0].click().run()
+    assert not app.exception
+
+    with open('config.json', 'rb') as f:
+        assert orjson.loads(f.read()) == {"frequencia_horas": 3}
+
+    # O cache da configuração foi limpo: a próxima execução volta a lê-la do disco
+    app.run()
+    assert not app.exception